@@ -42,6 +42,10 @@ else:
     genai.configure(api_key=GEMINI_API_KEY)
 
 
+# API metrics (per-request timing records in api_metrics); set API_METRICS_ENABLED=false to turn off
+API_METRICS_ENABLED = os.environ.get("API_METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
 def get_llm_api_key():
     """Get the LLM API key from environment variables."""
     return GEMINI_API_KEY
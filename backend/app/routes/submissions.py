@@ -14,6 +14,7 @@ from app.deps import get_current_user
 from app.models.user import User
 from app.utils.serialization import serialize_doc
 from app.config import logger
+from app.services.gridfs_helpers import load_gridfs_images
 
 router = APIRouter(tags=["submissions"])
 
@@ -119,7 +120,7 @@ async def get_submission(
                     annotated_oid = ObjectId(submission["annotated_images_gridfs_id"])
                     if fs.exists(annotated_oid):
                         grid_out = fs.get(annotated_oid)
-                        submission["annotated_images"] = pickle.loads(grid_out.read())
+                        submission["annotated_images"] = load_gridfs_images(grid_out)
                         logger.info(f"Retrieved {len(submission['annotated_images'])} annotated images from GridFS")
                 except Exception as e:
                     logger.error(f"Error retrieving annotated images from GridFS: {e}")
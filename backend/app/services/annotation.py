@@ -7,6 +7,7 @@ positioning grading marks on student answer images.
 """
 
 from typing import List, Dict, Optional
+import asyncio
 import base64
 import io
 import re
@@ -23,6 +24,9 @@ from app.utils.annotation_utils import (
 )
 from app.utils.vision_ocr_service import get_vision_service
 
+# Max concurrent Vision OCR requests per annotation run
+OCR_CONCURRENCY = 8
+
 
 def _generate_margin_annotations(
     page_idx: int,
@@ -342,6 +346,19 @@ async def generate_annotated_images_with_vision_ocr(
     pages_ocr = [None] * len(original_images)
     question_last_line: Dict[int, tuple] = {}  # q_num -> (page_idx, line_idx, line_box)
 
+    # The Vision client is blocking, so OCR all pages concurrently in worker threads
+    ocr_semaphore = asyncio.Semaphore(OCR_CONCURRENCY)
+
+    async def _ocr_page_words(image_b64: str) -> list:
+        async with ocr_semaphore:
+            try:
+                ocr_result = await asyncio.to_thread(vision_service.detect_text_from_base64, image_b64, ["en"])
+                return ocr_result.get("words", [])
+            except Exception:
+                return []
+
+    pages_words = await asyncio.gather(*(_ocr_page_words(img) for img in original_images))
+
     for p_idx, original_image_b64 in enumerate(original_images):
         try:
             image_data = base64.b64decode(original_image_b64)
@@ -350,11 +367,7 @@ async def generate_annotated_images_with_vision_ocr(
         except Exception:
             p_w, p_h = 1000, 1400
 
-        try:
-            ocr_result = vision_service.detect_text_from_base64(original_image_b64, ["en"])
-            words = ocr_result.get("words", [])
-        except Exception:
-            words = []
+        words = pages_words[p_idx]
 
         y_threshold = max(10, int(p_h * 0.012))
         line_boxes = _group_words_into_lines(words, y_threshold)
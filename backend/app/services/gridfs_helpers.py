@@ -2,14 +2,67 @@
 GridFS helpers for retrieving exam files (model answers, question papers).
 """
 
+import io
 import pickle
-from typing import List
+import struct
+import binascii
+from typing import Any, List
 
 from bson import ObjectId
 
 from app.database import db, fs
 from app.config import logger
 
+# Image lists stored with this metadata format_version are length-prefixed raw
+# image bytes instead of a pickled list of base64 strings
+FRAMED_IMAGES_FORMAT_VERSION = 2
+_FRAME_HEADER = struct.Struct("<I")
+
+
+def load_pickled_gridfs_file(grid_out) -> Any:
+    """Unpickle a GridFS file, streaming it chunk by chunk instead of one read()"""
+    buf = io.BytesIO()
+    chunk = grid_out.readchunk()
+    while chunk:
+        buf.write(chunk)
+        chunk = grid_out.readchunk()
+    buf.seek(0)
+    return pickle.load(buf)
+
+
+def pack_framed_images(images: List[str]) -> bytes:
+    """Pack base64 page images as length-prefixed raw bytes, ending with a zero-length frame"""
+    buf = bytearray()
+    for b64 in images:
+        raw = binascii.a2b_base64(b64)
+        buf += _FRAME_HEADER.pack(len(raw))
+        buf += raw
+    buf += _FRAME_HEADER.pack(0)
+    return bytes(buf)
+
+
+def unpack_framed_images(data: bytes) -> List[str]:
+    """Inverse of pack_framed_images - returns the pages as base64 strings"""
+    view = memoryview(data)
+    images = []
+    offset = 0
+    while True:
+        (length,) = _FRAME_HEADER.unpack_from(view, offset)
+        offset += _FRAME_HEADER.size
+        if length == 0:
+            break
+        images.append(binascii.b2a_base64(view[offset:offset + length], newline=False).decode("ascii"))
+        offset += length
+    return images
+
+
+def load_gridfs_images(grid_out) -> List[str]:
+    """Load a list of base64 page images from GridFS, framed or pickled"""
+    metadata = grid_out.metadata or {}
+    if metadata.get("format_version") == FRAMED_IMAGES_FORMAT_VERSION:
+        return unpack_framed_images(grid_out.read())
+    return load_pickled_gridfs_file(grid_out)
+
 
 async def get_exam_model_answer_images(exam_id: str) -> List[str]:
     """Get model answer images from GridFS or fallback to old storage"""
@@ -25,7 +78,7 @@ async def get_exam_model_answer_images(exam_id: str) -> List[str]:
             try:
                 from bson import ObjectId
                 gridfs_file = fs.get(ObjectId(file_doc["gridfs_id"]))
-                images = pickle.loads(gridfs_file.read())
+                images = load_pickled_gridfs_file(gridfs_file)
                 return images
             except Exception as e:
                 logger.error(f"Error retrieving from GridFS: {e}")
@@ -55,7 +108,7 @@ async def get_exam_question_paper_images(exam_id: str) -> List[str]:
             try:
                 from bson import ObjectId
                 gridfs_file = fs.get(ObjectId(file_doc["gridfs_id"]))
-                images = pickle.loads(gridfs_file.read())
+                images = load_pickled_gridfs_file(gridfs_file)
                 return images
             except Exception as e:
                 logger.error(f"Error retrieving from GridFS: {e}")
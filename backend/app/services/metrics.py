@@ -3,20 +3,42 @@ API metrics tracking and cleanup.
 """
 
 import uuid
+import json
 import asyncio
+import logging
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from app.database import db
 from app.config import logger
 
+# Write-behind fallback: batches that cannot be inserted are emitted here as
+# one JSON line per record, so they can be replayed into api_metrics later
+metrics_fallback_logger = logging.getLogger("gradesense.api_metrics")
 
-async def log_api_metric(endpoint: str, method: str, response_time_ms: int, 
-                         status_code: int, error_type: Optional[str], 
-                         user_id: Optional[str], ip_address: Optional[str]):
-    """Log API metrics to database"""
+
+# Bounded buffer between the request middleware and the batch flusher
+METRIC_QUEUE_MAXSIZE = 10000
+METRIC_FLUSH_BATCH_SIZE = 500
+METRIC_FLUSH_INTERVAL_SECONDS = 1.0
+
+# Number of metric records dropped because the queue was full
+dropped_metric_count = 0
+
+
+def new_metric_queue() -> asyncio.Queue:
+    """Create the bounded queue that buffers API metric records"""
+    return asyncio.Queue(maxsize=METRIC_QUEUE_MAXSIZE)
+
+
+def enqueue_api_metric(queue: asyncio.Queue, endpoint: str, method: str,
+                       response_time_ms: int, status_code: int,
+                       error_type: Optional[str], user_id: Optional[str],
+                       ip_address: Optional[str]):
+    """Buffer an API metric record for the flusher (never blocks the request)"""
+    global dropped_metric_count
     try:
-        await db.api_metrics.insert_one({
+        queue.put_nowait({
             "endpoint": endpoint,
             "method": method,
             "response_time_ms": response_time_ms,
@@ -26,8 +48,55 @@ async def log_api_metric(endpoint: str, method: str, response_time_ms: int,
             "ip_address": ip_address,
             "timestamp": datetime.now(timezone.utc).isoformat()
         })
+    except asyncio.QueueFull:
+        dropped_metric_count += 1
+        if dropped_metric_count % 1000 == 1:
+            logger.warning(f"API metric queue full - dropped {dropped_metric_count} records so far")
+
+
+async def _flush_api_metrics(batch: List[Dict]):
+    """Write one batch of API metrics to the database"""
+    try:
+        await db.api_metrics.insert_many(batch, ordered=False)
     except Exception as e:
-        logger.error(f"Failed to log API metric: {e}")
+        logger.error(f"Failed to log {len(batch)} API metrics: {e}")
+        for record in batch:
+            record.pop("_id", None)
+            metrics_fallback_logger.info(json.dumps(record))
+
+
+async def run_metric_flusher(queue: asyncio.Queue):
+    """Drain the metric queue, writing one insert_many per flush window"""
+    loop = asyncio.get_running_loop()
+    batch: List[Dict] = []
+    try:
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + METRIC_FLUSH_INTERVAL_SECONDS
+            while len(batch) < METRIC_FLUSH_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Records stay in batch until written, so a cancel mid-flush retries them
+            await _flush_api_metrics(batch)
+            batch = []
+    except asyncio.CancelledError:
+        # Write out whatever is still buffered before stopping
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            await _flush_api_metrics(batch)
+        raise
+
 
 async def log_user_event(event_type: str, user_id: str, role: str, 
                          ip_address: str, metadata: Dict = None):
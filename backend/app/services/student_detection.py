@@ -14,6 +14,14 @@ import google.generativeai as genai
 from app.database import db
 from app.config import logger, get_llm_api_key
 
+# Lowercased subject/exam words dropped from the name part of an uploaded filename
+FILENAME_SUBJECT_TOKENS = frozenset({
+    'maths', 'math', 'mathematics', 'english', 'science', 'physics',
+    'chemistry', 'biology', 'history', 'geography', 'hindi', 'sanskrit',
+    'social', 'economics', 'commerce', 'accounts', 'computer', 'it',
+    'arts', 'music', 'pe', 'physical', 'education', 'exam', 'test'
+})
+
 
 async def extract_student_info_from_paper(file_images: List[str], filename: str) -> tuple:
     """
@@ -111,14 +119,6 @@ def parse_student_from_filename(filename: str) -> tuple:
         # Remove .pdf extension
         name_part = filename.replace(".pdf", "").replace(".PDF", "")
         
-        # Common subject names to filter out
-        subject_names = [
-            'maths', 'math', 'mathematics', 'english', 'science', 'physics', 
-            'chemistry', 'biology', 'history', 'geography', 'hindi', 'sanskrit',
-            'social', 'economics', 'commerce', 'accounts', 'computer', 'it',
-            'arts', 'music', 'pe', 'physical', 'education', 'exam', 'test'
-        ]
-        
         # Split by underscore or hyphen
         parts = name_part.replace("-", "_").split("_")
         
@@ -127,10 +127,7 @@ def parse_student_from_filename(filename: str) -> tuple:
             potential_id = parts[0].strip()
             
             # Remaining parts form the name, excluding subject names
-            name_parts = []
-            for part in parts[1:]:
-                if part.lower() not in subject_names:
-                    name_parts.append(part)
+            name_parts = [part for part in parts[1:] if part.lower() not in FILENAME_SUBJECT_TOKENS]
             
             potential_name = " ".join(name_parts).strip().title()
             
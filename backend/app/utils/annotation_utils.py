@@ -7,6 +7,7 @@ import io
 import math
 import random
 import base64
+from functools import lru_cache
 from typing import List, Optional
 from dataclasses import dataclass, field
 from PIL import Image, ImageDraw, ImageFont
@@ -112,7 +113,7 @@ def apply_annotations_to_image(image_base64: str, annotations: List[Annotation])
 
         result = Image.alpha_composite(img, overlay).convert("RGB")
         buf = io.BytesIO()
-        result.save(buf, format="JPEG", quality=88)
+        result.save(buf, format="JPEG", quality=88, subsampling=2)
         return base64.b64encode(buf.getvalue()).decode()
 
     except Exception as e:
@@ -160,8 +161,9 @@ def auto_position_annotations_for_question(
 
 # ── Private drawing helpers — realistic examiner pen style ──────────
 
+@lru_cache(maxsize=32)
 def _get_font(size: int):
-    """Try to load a good font, fallback to default."""
+    """Try to load a good font, fallback to default. Cached per size."""
     paths = [
         "/System/Library/Fonts/Supplemental/Arial.ttf",       # macOS
         "/System/Library/Fonts/Helvetica.ttc",                 # macOS
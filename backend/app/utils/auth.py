@@ -2,6 +2,7 @@
 JWT-based authentication utilities for email/password login.
 """
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from passlib.context import CryptContext
 from jose import JWTError, jwt
@@ -49,3 +50,14 @@ def decode_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+@lru_cache(maxsize=4096)
+def user_id_from_token(token: str) -> Optional[str]:
+    """Best-effort user_id from a JWT session token, cached per token.
+
+    Only for attribution (e.g. API metrics) - the cache ignores expiry and
+    OAuth session tokens return None. Use get_current_user for auth.
+    """
+    payload = decode_token(token)
+    return payload.get("user_id") if payload else None
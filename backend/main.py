@@ -10,63 +10,114 @@ import asyncio
 import subprocess
 import shutil
 
+import anyio
 from fastapi import FastAPI, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import logger, get_version_info
+from app.config import logger, get_version_info, API_METRICS_ENABLED
 from app.database import client
 from app.services.background import run_background_worker
-from app.services.metrics import log_api_metric
+from app.services.metrics import new_metric_queue, enqueue_api_metric, run_metric_flusher
 from app.routes import register_all_routes
+from app.utils.auth import user_id_from_token
 
-# Global reference to the background worker task
-_worker_task = None
+# How long shutdown waits for background tasks before giving up on them
+SHUTDOWN_TIMEOUT_SECONDS = 20
+
+
+async def _stop_background_tasks(tasks):
+    """Cancel the tracked background tasks and wait (bounded) for them to finish"""
+    for task in tasks:
+        task.cancel()
+    done, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT_SECONDS)
+    if pending:
+        logger.warning(f"⚠️  {len(pending)} background task(s) did not stop within {SHUTDOWN_TIMEOUT_SECONDS}s")
+    for task in done:
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background task failed during shutdown: {task.exception()}")
+
+
+# Written once poppler-utils is known to be available, so later cold starts skip the check
+POPPLER_MARKER_PATH = "/tmp/.poppler_ok"
+
+
+def _install_poppler():
+    """Install poppler-utils, refreshing apt metadata only if the plain install fails"""
+    install_cmd = ["sudo", "apt-get", "install", "-y", "-qq", "poppler-utils"]
+    try:
+        subprocess.run(install_cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError:
+        subprocess.run(
+            ["sudo", "apt-get", "update", "-qq"],
+            check=True, capture_output=True
+        )
+        subprocess.run(install_cmd, check=True, capture_output=True)
+
+
+def _mark_poppler_ok():
+    """Record that poppler-utils is available (best effort)"""
+    try:
+        open(POPPLER_MARKER_PATH, "w").close()
+    except OSError:
+        pass
+
+
+async def _ensure_poppler():
+    """Make sure poppler-utils (pdftoppm) is available without blocking the event loop"""
+    if os.path.exists(POPPLER_MARKER_PATH):
+        logger.info("✅ poppler-utils is already installed")
+        return
+    if shutil.which("pdftoppm"):
+        logger.info("✅ poppler-utils is already installed")
+        _mark_poppler_ok()
+        return
+
+    logger.warning("⚠️  poppler-utils not found. Attempting to install...")
+    try:
+        await asyncio.to_thread(_install_poppler)
+        _mark_poppler_ok()
+        logger.info("✅ poppler-utils installed successfully")
+    except Exception as e:
+        logger.error(f"❌ Failed to install poppler-utils: {e}")
+        logger.error("⚠️  PDF processing may not work correctly!")
 
 
 async def lifespan(app: FastAPI):
     """Application lifespan manager - starts/stops background worker"""
-    global _worker_task
-
     # Startup: Check system dependencies
     logger.info("🚀 FastAPI app starting up...")
     logger.info("REGISTERED ROUTES: %s", [r.path for r in app.routes])
     logger.info("🔍 Checking system dependencies...")
 
-    # Check if poppler-utils is installed
-    if not shutil.which("pdftoppm"):
-        logger.warning("⚠️  poppler-utils not found. Attempting to install...")
-        try:
-            subprocess.run(
-                ["sudo", "apt-get", "update", "-qq"],
-                check=True, capture_output=True
-            )
-            subprocess.run(
-                ["sudo", "apt-get", "install", "-y", "poppler-utils"],
-                check=True, capture_output=True
-            )
-            logger.info("✅ poppler-utils installed successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to install poppler-utils: {e}")
-            logger.error("⚠️  PDF processing may not work correctly!")
+    if os.environ.get("GRADESENSE_SKIP_BOOTSTRAP") == "1":
+        logger.info("⏭️  GRADESENSE_SKIP_BOOTSTRAP set - skipping system dependency checks")
     else:
-        logger.info("✅ poppler-utils is already installed")
+        await _ensure_poppler()
+
+    # Long-lived tasks owned by the app; all are cancelled and awaited on shutdown
+    app.state.background_tasks = []
+
+    if API_METRICS_ENABLED:
+        app.state.metric_queue = new_metric_queue()
+        app.state.background_tasks.append(asyncio.create_task(run_metric_flusher(app.state.metric_queue)))
+    else:
+        logger.info("📉 API metrics disabled (API_METRICS_ENABLED=false)")
 
     logger.info("🔄 Starting integrated background task worker...")
-    _worker_task = asyncio.create_task(run_background_worker())
+    app.state.background_tasks.append(asyncio.create_task(run_background_worker()))
     logger.info("🔄 Background worker started")
     logger.info("=" * 60)
 
     yield
 
-    # Shutdown: Cancel the background worker
+    # Shutdown: Cancel the background worker and metric flusher. Shielded so a
+    # cancelled lifespan (e.g. SIGINT) still waits for the tasks to finish.
     logger.info("🛑 FastAPI app shutting down...")
-    if _worker_task and not _worker_task.done():
-        logger.info("⏹️  Stopping background task worker...")
-        _worker_task.cancel()
-        try:
-            await _worker_task
-        except asyncio.CancelledError:
-            logger.info("✅ Background task worker stopped cleanly")
+    logger.info("⏹️  Stopping background tasks...")
+    with anyio.CancelScope(shield=True):
+        await asyncio.shield(_stop_background_tasks(app.state.background_tasks))
+    app.state.background_tasks.clear()
+    logger.info("✅ Background tasks stopped")
 
 
 # Create the main app with lifespan
@@ -98,19 +149,21 @@ async def root_health_check():
 
 # ============== METRICS TRACKING MIDDLEWARE ==============
 
+# High-frequency endpoints (probes, session polling) that are not worth a metric record
+EXCLUDED_METRIC_PATHS = frozenset({"/health", "/api/auth/me", "/api/version"})
+
+
 @app.middleware("http")
 async def metrics_tracking_middleware(request: Request, call_next):
     """Track API metrics for all requests"""
-    start_time = time.time()
+    path = request.url.path
+    if not API_METRICS_ENABLED or path in EXCLUDED_METRIC_PATHS:
+        return await call_next(request)
 
-    user_id = None
-    try:
-        if request.url.path != "/api/auth/me":
-            auth_header = request.headers.get("cookie", "")
-            if "session" in auth_header:
-                pass
-    except:
-        pass
+    start_time = time.perf_counter()
+
+    session_token = request.cookies.get("session_token")
+    user_id = user_id_from_token(session_token) if session_token else None
 
     response = None
     error_type = None
@@ -125,17 +178,20 @@ async def metrics_tracking_middleware(request: Request, call_next):
         logger.error(f"Request failed: {str(e)}")
         raise
     finally:
-        response_time_ms = int((time.time() - start_time) * 1000)
-
-        asyncio.create_task(log_api_metric(
-            endpoint=request.url.path,
-            method=request.method,
-            response_time_ms=response_time_ms,
-            status_code=status_code,
-            error_type=error_type,
-            user_id=user_id,
-            ip_address=request.client.host if request.client else None
-        ))
+        response_time_ms = int((time.perf_counter() - start_time) * 1000)
+
+        queue = getattr(request.app.state, "metric_queue", None)
+        if queue is not None:
+            enqueue_api_metric(
+                queue,
+                endpoint=path,
+                method=request.method,
+                response_time_ms=response_time_ms,
+                status_code=status_code,
+                error_type=error_type,
+                user_id=user_id,
+                ip_address=request.client.host if request.client else None
+            )
 
     return response
 
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-import os, sys, pickle, base64
+import os, sys, base64
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from dotenv import load_dotenv
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 from app.database import db, fs
+from app.services.gridfs_helpers import load_gridfs_images
 from bson import ObjectId
 
 submission_id = sys.argv[1] if len(sys.argv) > 1 else None
@@ -24,7 +25,7 @@ async def run():
     if not imgs and sub.get('annotated_images_gridfs_id'):
         oid = ObjectId(sub['annotated_images_gridfs_id'])
         grid_out = fs.get(oid)
-        imgs = pickle.loads(grid_out.read())
+        imgs = load_gridfs_images(grid_out)
     print('Found', len(imgs), 'annotated pages')
     for i, b in enumerate(imgs[:10]):
         path = f'/tmp/regen_annot_page_{i+1}.jpg'
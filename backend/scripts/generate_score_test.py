@@ -11,14 +11,15 @@ try:
 except Exception:
     f = None
 # draw visual sections to emulate answers
-for i, y in enumerate(range(60, 900, 160), start=1):
+SECTION_TOPS = tuple(range(60, 900, 160))
+for i, y in enumerate(SECTION_TOPS, start=1):
     d.rectangle([(60, y-30),(820, y+100)], outline=(200,200,200))
     d.text((80, y), f"Q{i} sample answer line 1", fill=(0,0,0), font=f)
     d.text((80, y+24), "More answer text...", fill=(0,0,0), font=f)
     d.text((80, y+48), "Concluding sentence.", fill=(0,0,0), font=f)
 
 buf = io.BytesIO()
-img.save(buf, format='JPEG', quality=90)
+img.save(buf, format='JPEG', quality=85, subsampling=2, optimize=True)
 img_b64 = base64.b64encode(buf.getvalue()).decode()
 
 # create question scores (page_number is 1-indexed)
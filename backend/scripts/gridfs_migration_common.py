@@ -0,0 +1,178 @@
+"""
+Helpers shared by the migrate_*_to_gridfs.py scripts.
+
+Imported as a sibling module, so the scripts must be run from this directory
+or by path (python backend/scripts/migrate_submissions_to_gridfs.py).
+"""
+
+import sys
+import binascii
+from concurrent.futures import as_completed
+from pymongo.errors import BulkWriteError, PyMongoError
+
+try:
+    import zstandard
+except ImportError:  # optional - PDFs are stored uncompressed without it
+    zstandard = None
+
+# Concurrent GridFS uploads per document (each fs.put is a network round-trip)
+UPLOAD_WORKERS = 16
+
+# Payloads above the threshold (typically PDFs) use 4 MiB GridFS chunks instead
+# of the 255 KiB default, cutting the number of chunk documents written
+LARGE_FILE_THRESHOLD = 2 * 1024 * 1024
+LARGE_FILE_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 255 * 1024
+
+# Document updates are sent in unordered bulk writes of this size
+BULK_WRITE_BATCH_SIZE = 500
+
+# Set on every fully migrated document so re-runs skip it at the query level
+MIGRATED_FIELD = 'migrated_v1'
+PENDING_FILTER = {MIGRATED_FIELD: {'$ne': True}}
+
+HEX_DIGITS = '0123456789abcdef'
+
+
+def parse_shard_arg(argv):
+    """Parse an optional '--shard INDEX/COUNT' argument into (index, count)"""
+    if '--shard' not in argv:
+        return None
+    try:
+        index, count = (int(v) for v in argv[argv.index('--shard') + 1].split('/'))
+    except (IndexError, ValueError):
+        print("ERROR: --shard expects INDEX/COUNT, e.g. --shard 0/8")
+        sys.exit(1)
+    if count < 1 or not 0 <= index < count:
+        print("ERROR: --shard INDEX must be in [0, COUNT)")
+        sys.exit(1)
+    return index, count
+
+
+def shard_filter(index, count):
+    """Query clause selecting one shard, keyed on the low byte of the ObjectId counter"""
+    def hex_digit(pos):
+        return {'$indexOfCP': [HEX_DIGITS, {'$substrCP': [{'$toString': '$_id'}, pos, 1]}]}
+    low_byte = {'$add': [{'$multiply': [hex_digit(22), 16]}, hex_digit(23)]}
+    return {'$expr': {'$eq': [{'$mod': [low_byte, count]}, index]}}
+
+
+def decode_base64_payload(data):
+    """Decode a base64 string (optionally a data: URI) with the C-level decoder"""
+    if data.startswith('data:'):
+        data = data[data.find(',') + 1:]
+    return binascii.a2b_base64(data)
+
+
+def gridfs_chunk_size(num_bytes):
+    """GridFS chunk size to use for a payload of the given size"""
+    return LARGE_FILE_CHUNK_SIZE if num_bytes > LARGE_FILE_THRESHOLD else DEFAULT_CHUNK_SIZE
+
+
+def compress_pdf(file_bytes):
+    """zstd-compress a PDF payload when zstandard is installed and it helps.
+
+    Returns (payload, metadata); compressed files carry encoding='zstd' and
+    original_size so readers know to decompress.
+    """
+    if zstandard is None:
+        return file_bytes, {}
+    payload = zstandard.ZstdCompressor(level=3).compress(file_bytes)
+    if len(payload) >= len(file_bytes):
+        return file_bytes, {}
+    return payload, {"encoding": "zstd", "original_size": len(file_bytes)}
+
+
+def put_base64_image(fs, img_data, **kwargs):
+    """Decode a base64 image and store it in GridFS (runs in the upload pool)"""
+    img_bytes = decode_base64_payload(img_data)
+    return fs.put(img_bytes, chunkSize=gridfs_chunk_size(len(img_bytes)), **kwargs)
+
+
+def upload_pages(pool, fs, images, is_migrated, name_fn, meta_fn, label, kind, keep_non_strings=False):
+    """Upload the base64 pages of one image list concurrently, keeping page order.
+
+    Pages flagged in is_migrated are already GridFS ids and are kept as they are;
+    name_fn and meta_fn take a 1-based page number and return that upload's filename
+    and metadata. Non-string entries are kept only when keep_non_strings is set.
+    Returns (image_ids, uploaded_ids, errors): the rewritten list, which keeps the
+    original data for any page whose upload failed, the new GridFS ids, and the
+    number of failed pages (each is reported against label).
+    """
+    image_ids = []
+    futures = {}
+    for idx, img_data in enumerate(images):
+        if not isinstance(img_data, str):
+            if keep_non_strings:
+                image_ids.append(img_data)
+            continue
+
+        # Already a GridFS ID
+        if is_migrated[idx]:
+            image_ids.append(img_data)
+            continue
+
+        futures[pool.submit(
+            put_base64_image, fs, img_data,
+            filename=name_fn(idx + 1),
+            content_type="image/png",
+            metadata=meta_fn(idx + 1)
+        )] = (len(image_ids), idx)
+        image_ids.append(img_data)  # Keep original unless the upload succeeds
+
+    uploaded_ids = []
+    errors = 0
+    for future in as_completed(futures):
+        slot, idx = futures[future]
+        try:
+            img_id = future.result()
+        except Exception as e:
+            print(f"  {label}: ERROR migrating {kind} {idx}: {e}")
+            errors += 1
+            continue
+        uploaded_ids.append(img_id)
+        image_ids[slot] = str(img_id)
+    return image_ids, uploaded_ids, errors
+
+
+def flush_updates(collection, ops, fs, new_files):
+    """Apply queued UpdateOne operations in one unordered bulk write.
+
+    new_files maps the _id of every queued document to the GridFS ids uploaded
+    for it in this run. Returns (migrated, failed): the number of documents that
+    moved data and whose update was written, and the number of rejected updates.
+    GridFS files uploaded for a rejected update are deleted, since the document
+    still holds its base64 data and the next run uploads them again. Both queues
+    are cleared either way.
+    """
+    if not ops:
+        return 0, 0
+    try:
+        try:
+            result = collection.bulk_write(ops, ordered=False)
+            modified, rejected = result.modified_count, {}
+        except BulkWriteError as e:
+            modified = e.details['nModified']
+            rejected = {err['op']['q']['_id']: err['errmsg'] for err in e.details['writeErrors']}
+        except PyMongoError as e:
+            # Outcome unknown: some updates may have landed, so no uploads are deleted
+            print(f"ERROR writing batch of {len(ops)} updates: {e}")
+            return 0, len(ops)
+
+        for doc_id, errmsg in rejected.items():
+            print(f"ERROR writing update for {doc_id}: {errmsg}")
+            for file_id in new_files.get(doc_id, ()):
+                try:
+                    fs.delete(file_id)
+                except PyMongoError as e:
+                    print(f"  {doc_id}: could not delete orphaned GridFS file {file_id}: {e}")
+
+        # Only updates that move data or set the migrated flag are queued, and the pending
+        # filter excludes already-flagged documents, so every written update modifies its
+        # document; what remains of modified after the flag-only marks is the migrations
+        flag_only = sum(1 for doc_id, file_ids in new_files.items()
+                        if not file_ids and doc_id not in rejected)
+        return modified - flag_only, len(rejected)
+    finally:
+        ops.clear()
+        new_files.clear()
@@ -4,16 +4,26 @@ Migration script to move large embedded data from exam_files to GridFS.
 This fixes the Atlas deployment "transaction too large" error.
 
 Run this BEFORE deployment to clean up the database.
+
+The base64 decode is CPU-bound, so large databases can be split across
+processes with --shard INDEX/COUNT, e.g.:
+    for i in $(seq 0 7); do python migrate_large_files_to_gridfs.py --shard $i/8 & done; wait
 """
 
 import os
 import sys
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, UpdateOne
 from gridfs import GridFS
-import base64
 from datetime import datetime, timezone
 
-def migrate_exam_files_to_gridfs():
+from gridfs_migration_common import (
+    UPLOAD_WORKERS, BULK_WRITE_BATCH_SIZE, MIGRATED_FIELD, PENDING_FILTER,
+    parse_shard_arg, shard_filter, decode_base64_payload, gridfs_chunk_size,
+    compress_pdf, upload_pages, flush_updates
+)
+
+def migrate_exam_files_to_gridfs(shard=None):
     """Move file_data and images from exam_files documents to GridFS"""
     
     mongo_url = os.environ.get('MONGO_URL')
@@ -23,15 +33,35 @@ def migrate_exam_files_to_gridfs():
         print("ERROR: MONGO_URL and DB_NAME environment variables required")
         sys.exit(1)
     
-    client = MongoClient(mongo_url)
+    client = MongoClient(mongo_url, maxPoolSize=UPLOAD_WORKERS * 2)
     db = client[db_name]
     fs = GridFS(db)
+    pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
     
     print(f"Connected to database: {db_name}")
     
-    # Get all exam_files
-    exam_files = list(db.exam_files.find({}))
-    print(f"Found {len(exam_files)} exam_files documents")
+    # One timestamp for the whole run, stored as a native BSON date
+    migrated_at = datetime.now(timezone.utc)
+    
+    query = dict(PENDING_FILTER)
+    if shard:
+        query.update(shard_filter(*shard))
+        print(f"Processing shard {shard[0]}/{shard[1]}")
+    
+    # Get the exam_files not yet marked as migrated
+    db.exam_files.create_index(MIGRATED_FIELD)
+    total = db.exam_files.count_documents(query)
+    print(f"Found {total} exam_files documents to migrate")
+    
+    # Server-side cursor: documents are streamed in batches, not loaded all at once
+    exam_files = db.exam_files.find(
+        query,
+        projection={'exam_id': 1, 'file_id': 1, 'file_data': 1, 'images': 1},
+        batch_size=100
+    )
+    ops = []
+    # _id -> GridFS ids uploaded for that document, so a rejected update can drop them
+    new_files = {}
     
     migrated_count = 0
     already_migrated = 0
@@ -41,8 +71,10 @@ def migrate_exam_files_to_gridfs():
         exam_id = exam_file.get('exam_id')
         file_id = exam_file.get('file_id')
         
+        errors_before = errors
         try:
             updates = {}
+            uploaded = []
             
             # 1. Migrate file_data if it's base64 string
             if 'file_data' in exam_file and isinstance(exam_file['file_data'], str):
@@ -55,23 +87,27 @@ def migrate_exam_files_to_gridfs():
                     # Store in GridFS
                     try:
                         # Decode base64 if needed
-                        if file_data.startswith('data:'):
-                            file_data = file_data.split(',', 1)[1]
-                        
-                        file_bytes = base64.b64decode(file_data)
+                        file_bytes = decode_base64_payload(file_data)
+                        # Drop the base64 string so it can be freed while the upload runs
+                        exam_file['file_data'] = file_data = None
                         
                         # Store in GridFS
+                        payload, encoding_metadata = compress_pdf(file_bytes)
+                        
                         gridfs_id = fs.put(
-                            file_bytes,
+                            payload,
+                            chunkSize=gridfs_chunk_size(len(payload)),
                             filename=f"exam_{exam_id}_{file_id}.pdf",
                             content_type="application/pdf",
                             metadata={
                                 "exam_id": exam_id,
                                 "file_id": file_id,
-                                "migrated_at": datetime.now(timezone.utc).isoformat()
+                                "migrated_at": migrated_at,
+                                **encoding_metadata
                             }
                         )
                         
+                        uploaded.append(gridfs_id)
                         updates['file_data'] = str(gridfs_id)
                         print(f"  {exam_id}: Migrated file_data to GridFS ({len(file_bytes)} bytes -> {gridfs_id})")
                     
@@ -83,69 +119,57 @@ def migrate_exam_files_to_gridfs():
             if 'images' in exam_file and isinstance(exam_file['images'], list):
                 images = exam_file['images']
                 
-                # Check if already migrated (array of short IDs)
-                if images and all(isinstance(img, str) and len(img) < 100 for img in images):
+                # Short strings are GridFS IDs from an earlier run; check each page once
+                is_migrated = [isinstance(img, str) and len(img) < 100 for img in images]
+                if images and all(is_migrated):
                     print(f"  {exam_id}: images already migrated")
                 else:
-                    # Migrate each image
-                    image_ids = []
-                    for idx, img_data in enumerate(images):
-                        if not isinstance(img_data, str):
-                            continue
-                        
-                        # Check if already migrated
-                        if len(img_data) < 100:
-                            image_ids.append(img_data)
-                            continue
-                        
-                        try:
-                            # Decode base64
-                            if img_data.startswith('data:'):
-                                img_data = img_data.split(',', 1)[1]
-                            
-                            img_bytes = base64.b64decode(img_data)
-                            
-                            # Store in GridFS
-                            img_id = fs.put(
-                                img_bytes,
-                                filename=f"exam_{exam_id}_{file_id}_page_{idx+1}.png",
-                                content_type="image/png",
-                                metadata={
-                                    "exam_id": exam_id,
-                                    "file_id": file_id,
-                                    "page_number": idx + 1,
-                                    "migrated_at": datetime.now(timezone.utc).isoformat()
-                                }
-                            )
-                            
-                            image_ids.append(str(img_id))
-                        
-                        except Exception as e:
-                            print(f"  {exam_id}: ERROR migrating image {idx}: {e}")
-                            errors += 1
-                            image_ids.append(img_data)  # Keep original on error
+                    # Upload each page concurrently, keeping page order
+                    image_ids, page_ids, page_errors = upload_pages(
+                        pool, fs, images, is_migrated,
+                        name_fn=lambda page: f"exam_{exam_id}_{file_id}_page_{page}.png",
+                        meta_fn=lambda page: {
+                            "exam_id": exam_id,
+                            "file_id": file_id,
+                            "page_number": page,
+                            "migrated_at": migrated_at
+                        },
+                        label=exam_id, kind="image"
+                    )
+                    errors += page_errors
                     
-                    if image_ids:
+                    if page_ids:
+                        uploaded.extend(page_ids)
                         updates['images'] = image_ids
-                        print(f"  {exam_id}: Migrated {len(image_ids)} images to GridFS")
+                        print(f"  {exam_id}: Migrated {len(page_ids)} images to GridFS")
             
-            # Update document with GridFS references
-            if updates:
-                db.exam_files.update_one(
-                    {"_id": exam_file['_id']},
-                    {"$set": updates}
-                )
-                migrated_count += 1
-            else:
+            if not uploaded and errors == errors_before:
                 already_migrated += 1
+            
+            # Update document with GridFS references, marking it migrated unless a page failed
+            if errors == errors_before:
+                updates[MIGRATED_FIELD] = True
+            if updates:
+                ops.append(UpdateOne({"_id": exam_file['_id']}, {"$set": updates}))
+                new_files[exam_file['_id']] = uploaded
         
         except Exception as e:
             print(f"ERROR processing {exam_id}: {e}")
             errors += 1
+        
+        if len(ops) >= BULK_WRITE_BATCH_SIZE:
+            migrated, write_errors = flush_updates(db.exam_files, ops, fs, new_files)
+            migrated_count += migrated
+            errors += write_errors
+    
+    migrated, write_errors = flush_updates(db.exam_files, ops, fs, new_files)
+    migrated_count += migrated
+    errors += write_errors
+    pool.shutdown()
     
     print("\n" + "="*60)
     print(f"Migration Summary:")
-    print(f"  Total documents: {len(exam_files)}")
+    print(f"  Total documents: {total}")
     print(f"  Migrated: {migrated_count}")
     print(f"  Already migrated: {already_migrated}")
     print(f"  Errors: {errors}")
@@ -159,4 +183,4 @@ def migrate_exam_files_to_gridfs():
     print("The database is now ready for Atlas deployment.")
 
 if __name__ == "__main__":
-    migrate_exam_files_to_gridfs()
+    migrate_exam_files_to_gridfs(shard=parse_shard_arg(sys.argv[1:]))
@@ -2,16 +2,25 @@
 """
 Migration script to move submission_images from embedded base64 to GridFS.
 This fixes Atlas deployment "transaction too large" error.
+
+The base64 decode is CPU-bound, so large databases can be split across
+processes with --shard INDEX/COUNT, e.g.:
+    for i in $(seq 0 7); do python migrate_submission_images_to_gridfs.py --shard $i/8 & done; wait
 """
 
 import os
 import sys
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, UpdateOne
 from gridfs import GridFS
-import base64
 from datetime import datetime, timezone
 
-def migrate_submission_images_to_gridfs():
+from gridfs_migration_common import (
+    UPLOAD_WORKERS, BULK_WRITE_BATCH_SIZE, MIGRATED_FIELD, PENDING_FILTER,
+    parse_shard_arg, shard_filter, upload_pages, flush_updates
+)
+
+def migrate_submission_images_to_gridfs(shard=None):
     """Move file_images and annotated_images from submission_images to GridFS"""
     
     mongo_url = os.environ.get('MONGO_URL')
@@ -21,15 +30,35 @@ def migrate_submission_images_to_gridfs():
         print("ERROR: MONGO_URL and DB_NAME environment variables required")
         sys.exit(1)
     
-    client = MongoClient(mongo_url)
+    client = MongoClient(mongo_url, maxPoolSize=UPLOAD_WORKERS * 2)
     db = client[db_name]
     fs = GridFS(db)
+    pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
     
     print(f"Connected to database: {db_name}")
     
-    # Get all submission_images
-    submissions = list(db.submission_images.find({}))
-    print(f"Found {len(submissions)} submission_images documents")
+    # One timestamp for the whole run, stored as a native BSON date
+    migrated_at = datetime.now(timezone.utc)
+    
+    query = dict(PENDING_FILTER)
+    if shard:
+        query.update(shard_filter(*shard))
+        print(f"Processing shard {shard[0]}/{shard[1]}")
+    
+    # Get the submission_images not yet marked as migrated
+    db.submission_images.create_index(MIGRATED_FIELD)
+    total = db.submission_images.count_documents(query)
+    print(f"Found {total} submission_images documents to migrate")
+    
+    # Server-side cursor: documents are streamed in batches, not loaded all at once
+    submissions = db.submission_images.find(
+        query,
+        projection={'submission_id': 1, 'file_images': 1, 'annotated_images': 1},
+        batch_size=100
+    )
+    ops = []
+    # _id -> GridFS ids uploaded for that document, so a rejected update can drop them
+    new_files = {}
     
     migrated_count = 0
     already_migrated = 0
@@ -38,126 +67,94 @@ def migrate_submission_images_to_gridfs():
     for submission in submissions:
         submission_id = submission.get('submission_id')
         
+        errors_before = errors
         try:
             updates = {}
+            uploaded = []
             
             # 1. Migrate file_images array
             if 'file_images' in submission and isinstance(submission['file_images'], list):
                 file_images = submission['file_images']
                 
-                # Check if already migrated (array of short IDs)
-                if file_images and all(isinstance(img, str) and len(img) < 100 for img in file_images):
+                # Short strings are GridFS IDs from an earlier run; check each page once
+                is_migrated = [isinstance(img, str) and len(img) < 100 for img in file_images]
+                if file_images and all(is_migrated):
                     print(f"  {submission_id}: file_images already migrated")
                 else:
-                    # Migrate each image
-                    image_ids = []
-                    for idx, img_data in enumerate(file_images):
-                        if not isinstance(img_data, str):
-                            continue
-                        
-                        # Check if already migrated
-                        if len(img_data) < 100:
-                            image_ids.append(img_data)
-                            continue
-                        
-                        try:
-                            # Decode base64
-                            if img_data.startswith('data:'):
-                                img_data = img_data.split(',', 1)[1]
-                            
-                            img_bytes = base64.b64decode(img_data)
-                            
-                            # Store in GridFS
-                            img_id = fs.put(
-                                img_bytes,
-                                filename=f"submission_{submission_id}_file_page_{idx+1}.png",
-                                content_type="image/png",
-                                metadata={
-                                    "submission_id": submission_id,
-                                    "image_type": "file_image",
-                                    "page_number": idx + 1,
-                                    "migrated_at": datetime.now(timezone.utc).isoformat()
-                                }
-                            )
-                            
-                            image_ids.append(str(img_id))
-                        
-                        except Exception as e:
-                            print(f"  {submission_id}: ERROR migrating file_image {idx}: {e}")
-                            errors += 1
-                            image_ids.append(img_data)  # Keep original on error
+                    # Upload each page concurrently, keeping page order
+                    image_ids, page_ids, page_errors = upload_pages(
+                        pool, fs, file_images, is_migrated,
+                        name_fn=lambda page: f"submission_{submission_id}_file_page_{page}.png",
+                        meta_fn=lambda page: {
+                            "submission_id": submission_id,
+                            "image_type": "file_image",
+                            "page_number": page,
+                            "migrated_at": migrated_at
+                        },
+                        label=submission_id, kind="file_image"
+                    )
+                    errors += page_errors
                     
-                    if image_ids:
+                    if page_ids:
+                        uploaded.extend(page_ids)
                         updates['file_images'] = image_ids
-                        print(f"  {submission_id}: Migrated {len(image_ids)} file_images to GridFS")
+                        print(f"  {submission_id}: Migrated {len(page_ids)} file_images to GridFS")
             
             # 2. Migrate annotated_images array
             if 'annotated_images' in submission and isinstance(submission['annotated_images'], list):
                 annotated_images = submission['annotated_images']
                 
-                # Check if already migrated
-                if annotated_images and all(isinstance(img, str) and len(img) < 100 for img in annotated_images):
+                # Short strings are GridFS IDs from an earlier run; check each page once
+                is_migrated = [isinstance(img, str) and len(img) < 100 for img in annotated_images]
+                if annotated_images and all(is_migrated):
                     print(f"  {submission_id}: annotated_images already migrated")
                 else:
-                    # Migrate each image
-                    image_ids = []
-                    for idx, img_data in enumerate(annotated_images):
-                        if not isinstance(img_data, str):
-                            continue
-                        
-                        # Check if already migrated
-                        if len(img_data) < 100:
-                            image_ids.append(img_data)
-                            continue
-                        
-                        try:
-                            # Decode base64
-                            if img_data.startswith('data:'):
-                                img_data = img_data.split(',', 1)[1]
-                            
-                            img_bytes = base64.b64decode(img_data)
-                            
-                            # Store in GridFS
-                            img_id = fs.put(
-                                img_bytes,
-                                filename=f"submission_{submission_id}_annotated_page_{idx+1}.png",
-                                content_type="image/png",
-                                metadata={
-                                    "submission_id": submission_id,
-                                    "image_type": "annotated_image",
-                                    "page_number": idx + 1,
-                                    "migrated_at": datetime.now(timezone.utc).isoformat()
-                                }
-                            )
-                            
-                            image_ids.append(str(img_id))
-                        
-                        except Exception as e:
-                            print(f"  {submission_id}: ERROR migrating annotated_image {idx}: {e}")
-                            errors += 1
-                            image_ids.append(img_data)  # Keep original on error
+                    # Upload each page concurrently, keeping page order
+                    image_ids, page_ids, page_errors = upload_pages(
+                        pool, fs, annotated_images, is_migrated,
+                        name_fn=lambda page: f"submission_{submission_id}_annotated_page_{page}.png",
+                        meta_fn=lambda page: {
+                            "submission_id": submission_id,
+                            "image_type": "annotated_image",
+                            "page_number": page,
+                            "migrated_at": migrated_at
+                        },
+                        label=submission_id, kind="annotated_image"
+                    )
+                    errors += page_errors
                     
-                    if image_ids:
+                    if page_ids:
+                        uploaded.extend(page_ids)
                         updates['annotated_images'] = image_ids
-                        print(f"  {submission_id}: Migrated {len(image_ids)} annotated_images to GridFS")
+                        print(f"  {submission_id}: Migrated {len(page_ids)} annotated_images to GridFS")
             
-            # Update document with GridFS references
-            if updates:
-                db.submission_images.update_one(
-                    {"_id": submission['_id']},
-                    {"$set": updates}
-                )
-                migrated_count += 1
-            else:
+            if not uploaded and errors == errors_before:
                 already_migrated += 1
+            
+            # Update document with GridFS references, marking it migrated unless a page failed
+            if errors == errors_before:
+                updates[MIGRATED_FIELD] = True
+            if updates:
+                ops.append(UpdateOne({"_id": submission['_id']}, {"$set": updates}))
+                new_files[submission['_id']] = uploaded
         
         except Exception as e:
             print(f"ERROR processing {submission_id}: {e}")
             errors += 1
+        
+        if len(ops) >= BULK_WRITE_BATCH_SIZE:
+            migrated, write_errors = flush_updates(db.submission_images, ops, fs, new_files)
+            migrated_count += migrated
+            errors += write_errors
+    
+    migrated, write_errors = flush_updates(db.submission_images, ops, fs, new_files)
+    migrated_count += migrated
+    errors += write_errors
+    pool.shutdown()
     
     print("\n" + "="*60)
     print(f"Migration Summary:")
-    print(f"  Total documents: {len(submissions)}")
+    print(f"  Total documents: {total}")
     print(f"  Migrated: {migrated_count}")
     print(f"  Already migrated: {already_migrated}")
     print(f"  Errors: {errors}")
@@ -170,4 +167,4 @@ def migrate_submission_images_to_gridfs():
     print("\n✅ Migration completed successfully!")
 
 if __name__ == "__main__":
-    migrate_submission_images_to_gridfs()
+    migrate_submission_images_to_gridfs(shard=parse_shard_arg(sys.argv[1:]))
@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 """
 Migration script to move submissions file_data and file_images to GridFS.
+
+The base64 decode is CPU-bound, so large databases can be split across
+processes with --shard INDEX/COUNT, e.g.:
+    for i in $(seq 0 7); do python migrate_submissions_to_gridfs.py --shard $i/8 & done; wait
 """
 
 import os
 import sys
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, UpdateOne
 from gridfs import GridFS
-import base64
 from datetime import datetime, timezone
 
-def migrate_submissions_to_gridfs():
+from gridfs_migration_common import (
+    UPLOAD_WORKERS, BULK_WRITE_BATCH_SIZE, MIGRATED_FIELD, PENDING_FILTER,
+    parse_shard_arg, shard_filter, decode_base64_payload, gridfs_chunk_size,
+    compress_pdf, upload_pages, flush_updates
+)
+
+def migrate_submissions_to_gridfs(shard=None):
     """Move file_data and file_images from submissions to GridFS"""
     
     mongo_url = os.environ.get('MONGO_URL')
@@ -20,24 +30,47 @@ def migrate_submissions_to_gridfs():
         print("ERROR: MONGO_URL and DB_NAME environment variables required")
         sys.exit(1)
     
-    client = MongoClient(mongo_url)
+    client = MongoClient(mongo_url, maxPoolSize=UPLOAD_WORKERS * 2)
     db = client[db_name]
     fs = GridFS(db)
+    pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
     
     print(f"Connected to database: {db_name}")
     
-    # Get all submissions
-    submissions = list(db.submissions.find({}))
-    print(f"Found {len(submissions)} submissions documents")
+    # One timestamp for the whole run, stored as a native BSON date
+    migrated_at = datetime.now(timezone.utc)
+    
+    query = dict(PENDING_FILTER)
+    if shard:
+        query.update(shard_filter(*shard))
+        print(f"Processing shard {shard[0]}/{shard[1]}")
+    
+    # Get the submissions not yet marked as migrated
+    db.submissions.create_index(MIGRATED_FIELD)
+    total = db.submissions.count_documents(query)
+    print(f"Found {total} submissions documents to migrate")
+    
+    # Server-side cursor: documents are streamed in batches, not loaded all at once
+    submissions = db.submissions.find(
+        query,
+        projection={'submission_id': 1, 'file_data': 1, 'file_images': 1},
+        batch_size=100
+    )
+    ops = []
+    # _id -> GridFS ids uploaded for that document, so a rejected update can drop them
+    new_files = {}
     
     migrated_count = 0
     already_migrated = 0
+    errors = 0
     
     for submission in submissions:
         submission_id = submission.get('submission_id')
         
+        failed = False
         try:
             updates = {}
+            uploaded = []
             
             # Migrate file_data if large
             if 'file_data' in submission and isinstance(submission['file_data'], str):
@@ -48,85 +81,91 @@ def migrate_submissions_to_gridfs():
                     pass
                 else:
                     try:
-                        if file_data.startswith('data:'):
-                            file_data = file_data.split(',', 1)[1]
+                        file_bytes = decode_base64_payload(file_data)
+                        # Drop the base64 string so it can be freed while the upload runs
+                        submission['file_data'] = file_data = None
                         
-                        file_bytes = base64.b64decode(file_data)
+                        payload, encoding_metadata = compress_pdf(file_bytes)
                         
                         gridfs_id = fs.put(
-                            file_bytes,
+                            payload,
+                            chunkSize=gridfs_chunk_size(len(payload)),
                             filename=f"submission_{submission_id}_file.pdf",
                             content_type="application/pdf",
                             metadata={
                                 "submission_id": submission_id,
-                                "migrated_at": datetime.now(timezone.utc).isoformat()
+                                "migrated_at": migrated_at,
+                                **encoding_metadata
                             }
                         )
                         
+                        uploaded.append(gridfs_id)
                         updates['file_data'] = str(gridfs_id)
                         print(f"  {submission_id}: Migrated file_data to GridFS ({len(file_bytes)/1024:.1f}KB)")
                     except Exception as e:
                         print(f"  {submission_id}: ERROR migrating file_data: {e}")
+                        failed = True
             
             # Migrate file_images if large
             if 'file_images' in submission and isinstance(submission['file_images'], list):
                 file_images = submission['file_images']
                 
-                if file_images and all(isinstance(img, str) and len(img) < 100 for img in file_images):
+                # Short strings are GridFS IDs from an earlier run; check each page once
+                is_migrated = [isinstance(img, str) and len(img) < 100 for img in file_images]
+                if file_images and all(is_migrated):
                     # Already migrated
                     pass
                 else:
-                    image_ids = []
-                    for idx, img_data in enumerate(file_images):
-                        if not isinstance(img_data, str) or len(img_data) < 100:
-                            image_ids.append(img_data)
-                            continue
-                        
-                        try:
-                            if img_data.startswith('data:'):
-                                img_data = img_data.split(',', 1)[1]
-                            
-                            img_bytes = base64.b64decode(img_data)
-                            
-                            img_id = fs.put(
-                                img_bytes,
-                                filename=f"submission_{submission_id}_page_{idx+1}.png",
-                                content_type="image/png",
-                                metadata={
-                                    "submission_id": submission_id,
-                                    "page_number": idx + 1,
-                                    "migrated_at": datetime.now(timezone.utc).isoformat()
-                                }
-                            )
-                            
-                            image_ids.append(str(img_id))
-                        except Exception as e:
-                            print(f"  {submission_id}: ERROR migrating image {idx}: {e}")
-                            image_ids.append(img_data)
+                    image_ids, page_ids, page_errors = upload_pages(
+                        pool, fs, file_images, is_migrated,
+                        name_fn=lambda page: f"submission_{submission_id}_page_{page}.png",
+                        meta_fn=lambda page: {
+                            "submission_id": submission_id,
+                            "page_number": page,
+                            "migrated_at": migrated_at
+                        },
+                        label=submission_id, kind="image", keep_non_strings=True
+                    )
+                    if page_errors:
+                        failed = True
                     
-                    if image_ids:
+                    if page_ids:
+                        uploaded.extend(page_ids)
                         updates['file_images'] = image_ids
-                        print(f"  {submission_id}: Migrated {len(image_ids)} file_images to GridFS")
+                        print(f"  {submission_id}: Migrated {len(page_ids)} file_images to GridFS")
             
-            if updates:
-                db.submissions.update_one(
-                    {"_id": submission['_id']},
-                    {"$set": updates}
-                )
-                migrated_count += 1
-            else:
+            if not uploaded and not failed:
                 already_migrated += 1
+            
+            # Update document with GridFS references, marking it migrated unless a page failed
+            if not failed:
+                updates[MIGRATED_FIELD] = True
+            if updates:
+                ops.append(UpdateOne({"_id": submission['_id']}, {"$set": updates}))
+                new_files[submission['_id']] = uploaded
         
         except Exception as e:
             print(f"ERROR processing {submission_id}: {e}")
+            errors += 1
+        
+        if len(ops) >= BULK_WRITE_BATCH_SIZE:
+            migrated, write_errors = flush_updates(db.submissions, ops, fs, new_files)
+            migrated_count += migrated
+            errors += write_errors
+    
+    migrated, write_errors = flush_updates(db.submissions, ops, fs, new_files)
+    migrated_count += migrated
+    errors += write_errors
+    pool.shutdown()
     
     print("\n" + "="*60)
     print(f"Migration Summary:")
-    print(f"  Total: {len(submissions)}")
+    print(f"  Total: {total}")
     print(f"  Migrated: {migrated_count}")
     print(f"  Already migrated: {already_migrated}")
+    print(f"  Errors: {errors}")
     print("="*60)
     print("\n✅ Migration completed!")
 
 if __name__ == "__main__":
-    migrate_submissions_to_gridfs()
+    migrate_submissions_to_gridfs(shard=parse_shard_arg(sys.argv[1:]))
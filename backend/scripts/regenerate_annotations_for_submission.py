@@ -6,7 +6,9 @@ If no submission_id provided, the script picks the most recent submission with i
 import os
 import sys
 import pickle
+import asyncio
 from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 
@@ -14,7 +16,20 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app.database import db, fs
+from app.services.gridfs_helpers import (
+    pack_framed_images, unpack_framed_images, FRAMED_IMAGES_FORMAT_VERSION
+)
 from app.services.annotation import generate_annotated_images_with_vision_ocr
+from app.utils.vision_ocr_service import get_vision_service
+
+
+async def load_gridfs_images_async(gridfs_id):
+    """Download an image list through Motor's async GridFS bucket (framed or pickled)"""
+    stream = await AsyncIOMotorGridFSBucket(db).open_download_stream(ObjectId(gridfs_id))
+    data = await stream.read()
+    if (stream.metadata or {}).get('format_version') == FRAMED_IMAGES_FORMAT_VERSION:
+        return unpack_framed_images(data)
+    return pickle.loads(data)
 
 
 async def pick_submission(submission_id=None):
@@ -32,16 +47,17 @@ async def main(submission_id=None):
         return
     print('Selected submission:', sub['submission_id'])
 
-    # load images
+    # load images, overlapping the GridFS download with Vision client start-up
+    vision_ready = asyncio.create_task(asyncio.to_thread(get_vision_service().is_available))
     images = sub.get('file_images') or []
     if not images and sub.get('images_gridfs_id'):
         try:
-            oid = ObjectId(sub['images_gridfs_id'])
-            grid_out = fs.get(oid)
-            images = pickle.loads(grid_out.read())
+            images = await load_gridfs_images_async(sub['images_gridfs_id'])
         except Exception as e:
             print('Failed to load images from GridFS:', e)
+            vision_ready.cancel()
             return
+    await vision_ready
 
     question_scores = sub.get('question_scores', [])
 
@@ -70,15 +86,20 @@ async def main(submission_id=None):
 
     # store back to GridFS
     try:
-        data = pickle.dumps(annotated)
-        aid = fs.put(data, filename=f"{sub['submission_id']}_annotated_regen.pkl", submission_id=sub['submission_id'])
-        db.submissions.update_one({'submission_id': sub['submission_id']}, {'$set': {'annotated_images_gridfs_id': str(aid), 'annotated_images': annotated}})
+        # Length-prefixed raw JPEG frames: no base64 expansion and no pickle
+        data = pack_framed_images(annotated)
+        aid = fs.put(
+            data,
+            filename=f"{sub['submission_id']}_annotated_regen.bin",
+            submission_id=sub['submission_id'],
+            metadata={'format_version': FRAMED_IMAGES_FORMAT_VERSION}
+        )
+        await db.submissions.update_one({'submission_id': sub['submission_id']}, {'$set': {'annotated_images_gridfs_id': str(aid), 'annotated_images': annotated}})
         print('Updated submission with regenerated annotated images (gridfs id:', aid, ')')
     except Exception as e:
         print('Failed to store annotated images:', e)
 
 
 if __name__ == '__main__':
-    import asyncio
     sid = sys.argv[1] if len(sys.argv) > 1 else None
     asyncio.run(main(sid))
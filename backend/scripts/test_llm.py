@@ -1,12 +1,30 @@
 import os, asyncio, sys
-sys.path.insert(0, os.getcwd())
+# Only touch sys.path when not already run as `python -m scripts.test_llm` from backend/
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+from types import SimpleNamespace
 from app.services.llm import LlmChat, UserMessage
 from app.config import GEMINI_API_KEY
 
+# LLM_TEST_MODE=mock exercises the LlmChat plumbing without calling Gemini
+MOCK_MODE = os.environ.get('LLM_TEST_MODE') == 'mock'
+
 print('GEMINI_API_KEY set?', bool(GEMINI_API_KEY))
 
+
+class MockChatSession:
+    """Stands in for the genai chat session and returns a canned reply."""
+
+    def send_message(self, parts):
+        return SimpleNamespace(text='hi')
+
+
 async def test():
     chat = LlmChat(session_id='test', system_message='You are a test.').with_model('gemini','gemini-2.5-flash').with_params(temperature=0)
+    if MOCK_MODE:
+        print('LLM_TEST_MODE=mock, skipping the live Gemini call')
+        chat._chat = MockChatSession()
     try:
         resp = await chat.send_message(UserMessage(text='Say hi'))
         print('LLM ok, response len=', len(resp))
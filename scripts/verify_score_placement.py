@@ -1,14 +1,28 @@
-import sys, base64, io
-sys.path.insert(0, 'backend')
+import os, sys, base64, io
+import asyncio
+import numpy as np
+# Resolve backend/ from this file so the script works from any cwd, and skip the
+# insert when backend/ is already importable
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
 from PIL import Image
-from app.services.annotation import generate_annotated_images_with_vision_ocr
-from app.models.submission import QuestionScore
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    turbo_jpeg = TurboJPEG()
+except Exception:  # module or libturbojpeg missing
+    turbo_jpeg = None
 
-# make blank image
+# make blank image; uncompressed PNG is near-free to encode for a solid page
 img = Image.new('RGB', (800,1200), (255,255,255))
-buf = io.BytesIO(); img.save(buf, format='JPEG')
+buf = io.BytesIO(); img.save(buf, format='PNG', optimize=False, compress_level=0)
 img_b64 = base64.b64encode(buf.getvalue()).decode()
 
+# The same blank page encoded the way the annotator saves pages; an annotated
+# page no bigger than this (plus slack) has nothing drawn on it at all
+blank_jpeg = io.BytesIO(); img.save(blank_jpeg, format='JPEG', quality=88, subsampling=2)
+BLANK_SIZE_SLACK = 200
+
 words = [
     {"text": "Q1.", "x1": 40, "y1": 120, "x2": 80, "y2": 140},
     {"text": "Describe", "x1": 90, "y1": 120, "x2": 220, "y2": 140},
@@ -18,32 +32,55 @@ words = [
 ]
 
 class FakeVision:
+    def __init__(self):
+        # Built once and handed back on every call
+        self._response = {'words': words}
     def is_available(self):
         return True
     def detect_text_from_base64(self, image_base64, languages=None):
-        return {'words': words}
+        return self._response
 
-import app.services.annotation as ann_mod
-ann_mod.get_vision_service = lambda: FakeVision()
+def main():
+    # The annotation chain (vision SDK, OpenCV, ...) is only imported once the cheap setup is done
+    import app.services.annotation as ann_mod
+    from app.models.submission import QuestionScore
+    fake_vision = FakeVision()
+    ann_mod.get_vision_service = lambda: fake_vision
 
-qs = QuestionScore(question_number=1, max_marks=10, obtained_marks=8, ai_feedback='ok', page_number=1)
+    qs = QuestionScore(question_number=1, max_marks=10, obtained_marks=8, ai_feedback='ok', page_number=1)
 
-import asyncio
-annotated = asyncio.get_event_loop().run_until_complete(
-    generate_annotated_images_with_vision_ocr([img_b64], [qs], use_vision_ocr=True)
-)
-print('generated', type(annotated), len(annotated))
-from PIL import Image
-img2 = Image.open(io.BytesIO(base64.b64decode(annotated[0]))).convert('RGB')
-w,h = img2.size
-place_x = min(80 + 60, w - 48)
-text_x = min(place_x + 34, w - 140)
-mid_y = (120 + 140)//2
-text_y = max(8, mid_y - 12)
-print('expected text coords', text_x, text_y)
-box = (int(text_x)-8, int(text_y)-8, int(text_x)+32, int(text_y)+8)
-box = (max(0,box[0]), max(0,box[1]), min(w,box[2]), min(h,box[3]))
-print('sample box', box)
-px = img2.crop(box).getdata()
-nonwhite = any(p != (255,255,255) for p in px)
-print('non-white found near expected location?', nonwhite)
+    annotated = asyncio.run(
+        ann_mod.generate_annotated_images_with_vision_ocr([img_b64], [qs], use_vision_ocr=True)
+    )
+    print('generated', type(annotated), len(annotated))
+    annotated_jpeg = base64.b64decode(annotated[0])
+    w,h = img.size  # annotation keeps the page size
+    place_x = min(80 + 60, w - 48)
+    text_x = min(place_x + 34, w - 140)
+    mid_y = (120 + 140)//2
+    text_y = max(8, mid_y - 12)
+    print('expected text coords', text_x, text_y)
+    box = (int(text_x)-8, int(text_y)-8, int(text_x)+32, int(text_y)+8)
+    box = (max(0,box[0]), max(0,box[1]), min(w,box[2]), min(h,box[3]))
+    print('sample box', box)
+    print('annotated size', len(annotated_jpeg), 'blank size', blank_jpeg.tell())
+    if len(annotated_jpeg) <= blank_jpeg.tell() + BLANK_SIZE_SLACK:
+        # Blank output: no need to decode the JPEG to know the box is white
+        nonwhite = False
+    else:
+        if turbo_jpeg is not None:
+            # Losslessly cut the 16px-MCU-aligned region out first so only its blocks are decoded
+            mx, my = box[0] - box[0] % 16, box[1] - box[1] % 16
+            mw = min(w - mx, -(-(box[2] - mx) // 16) * 16)
+            mh = min(h - my, -(-(box[3] - my) // 16) * 16)
+            region = turbo_jpeg.decode(turbo_jpeg.crop(annotated_jpeg, mx, my, mw, mh), pixel_format=TJPF_RGB)
+            arr = region[box[1]-my:box[3]-my, box[0]-mx:box[2]-mx]
+        else:
+            img2 = Image.open(io.BytesIO(annotated_jpeg)).convert('RGB')
+            arr = np.asarray(img2.crop(box))
+        nonwhite = bool((arr != 255).any())
+    print('non-white found near expected location?', nonwhite)
+
+
+if __name__ == '__main__':
+    main()
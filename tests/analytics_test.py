@@ -1,29 +1,123 @@
 #!/usr/bin/env python3
 
-import requests
+import asyncio
+import httpx
 import sys
 import json
 from datetime import datetime
-import subprocess
 import os
+import logging
+from string import Template
+from logging.handlers import MemoryHandler
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Setup is passed to mongosh with --eval and the same process then stays open as
+# a shell, so cleanup is fed to it at the end instead of spawning a second mongosh
+MONGO_SETUP_SENTINEL = '__analytics_setup_done__'
+MONGO_SETUP_TEMPLATE = Template("""
+use('test_database');
+var userId = '$user_id';
+var sessionToken = '$session_token';
+var expiresAt = new Date(Date.now() + 7*24*60*60*1000);
+
+// Insert test user
+db.users.insertOne({
+  user_id: userId,
+  email: 'analytics.test.$timestamp@example.com',
+  name: 'Analytics Test Teacher',
+  picture: 'https://via.placeholder.com/150',
+  role: 'teacher',
+  batches: [],
+  created_at: new Date().toISOString()
+});
+
+// Insert session
+db.user_sessions.insertOne({
+  user_id: userId,
+  session_token: sessionToken,
+  expires_at: expiresAt.toISOString(),
+  created_at: new Date().toISOString()
+});
+
+print('$sentinel');
+""")
+MONGO_CLEANUP_COMMANDS = """
+use('test_database');
+// Clean up analytics test data
+db.users.deleteMany({email: /analytics\\.test\\./});
+db.user_sessions.deleteMany({session_token: /analytics_test_session/});
+db.batches.deleteMany({name: /Analytics Test Batch/});
+db.subjects.deleteMany({name: /Analytics Test Subject/});
+db.exams.deleteMany({exam_name: /Analytics Test Exam/});
+db.submissions.deleteMany({student_name: /Analytics Test Student/});
+"""
+
+# Endpoints that call Gemini server-side can take far longer than the 10s CRUD default
+LLM_ENDPOINT_TIMEOUT = httpx.Timeout(10.0, connect=5.0, read=60.0)
+
+def encode_json(payload):
+    """Encode a request body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+def decode_json(response):
+    """Decode a response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
 
 class AnalyticsAPITester:
     def __init__(self):
         self.base_url = "https://smartgrade-app-1.preview.emergentagent.com/api"
-        self.session_token = None
-        self.user_id = None
         self.tests_run = 0
         self.tests_passed = 0
         self.test_results = []
 
+        # One pooled keep-alive async client for every request, created in run_analytics_tests
+        self.client = None
+
+        # Progress output is buffered and written once after the run instead of a print per line
+        self.log = logging.getLogger('analytics_test')
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+        self.log_buffer = MemoryHandler(capacity=10000, flushLevel=logging.CRITICAL,
+                                        target=logging.StreamHandler(sys.stdout))
+        self.log.addHandler(self.log_buffer)
+
+        timestamp = int(datetime.now().timestamp())
+        self.user_id = f"analytics-test-user-{timestamp}"
+        self.session_token = f"analytics_test_session_{timestamp}"
+        self.mongo_shell = None
+        self.mongo_setup_script = MONGO_SETUP_TEMPLATE.substitute(
+            user_id=self.user_id,
+            session_token=self.session_token,
+            timestamp=timestamp,
+            sentinel=MONGO_SETUP_SENTINEL
+        )
+
+    def create_client(self):
+        """Create the shared async HTTP client"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={'Content-Type': 'application/json'},
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            transport=httpx.AsyncHTTPTransport(retries=3)
+        )
+
     def log_test(self, name, success, details=""):
         """Log test result"""
         self.tests_run += 1
         if success:
             self.tests_passed += 1
-            print(f"✅ {name} - PASSED")
+            self.log.info(f"✅ {name} - PASSED")
         else:
-            print(f"❌ {name} - FAILED: {details}")
+            self.log.info(f"❌ {name} - FAILED: {details}")
         
         self.test_results.append({
             "test": name,
@@ -31,31 +125,22 @@ class AnalyticsAPITester:
             "details": details
         })
 
-    def run_api_test(self, name, method, endpoint, expected_status, data=None, headers=None):
-        """Run a single API test"""
+    async def run_api_test(self, name, method, endpoint, expected_status, data=None, headers=None, data_bytes=None,
+                           timeout=httpx.USE_CLIENT_DEFAULT):
+        """Run a single API test; data_bytes is an already-encoded JSON body"""
         url = f"{self.base_url}/{endpoint}"
-        test_headers = {'Content-Type': 'application/json'}
-        
-        if self.session_token:
-            test_headers['Authorization'] = f'Bearer {self.session_token}'
-        
-        if headers:
-            test_headers.update(headers)
 
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
+        self.log.info(f"\n🔍 Testing {name}...")
+        self.log.info(f"   URL: {url}")
         
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers, timeout=10)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, timeout=10)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers, timeout=10)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers, timeout=10)
-
-            print(f"   Status: {response.status_code}")
+            if data_bytes is None and data is not None:
+                data_bytes = encode_json(data)
+            # Content-Type is already set on the client
+            response = await self.client.request(method, f"/{endpoint}", content=data_bytes, headers=headers,
+                                                 timeout=timeout)
+
+            self.log.info(f"   Status: {response.status_code}")
             
             success = response.status_code == expected_status
             details = ""
@@ -63,7 +148,7 @@ class AnalyticsAPITester:
             if not success:
                 details = f"Expected {expected_status}, got {response.status_code}"
                 try:
-                    error_data = response.json()
+                    error_data = decode_json(response)
                     details += f" - {error_data.get('detail', 'No error details')}"
                 except:
                     details += f" - Response: {response.text[:200]}"
@@ -72,7 +157,7 @@ class AnalyticsAPITester:
             
             if success:
                 try:
-                    return response.json()
+                    return decode_json(response)
                 except:
                     return {"status": "success"}
             else:
@@ -82,85 +167,84 @@ class AnalyticsAPITester:
             self.log_test(name, False, f"Request failed: {str(e)}")
             return None
 
-    def create_test_user_and_session(self):
-        """Create test user and session in MongoDB"""
-        print("\n🔧 Creating test user and session in MongoDB...")
-        
-        timestamp = int(datetime.now().timestamp())
-        self.user_id = f"analytics-test-user-{timestamp}"
-        self.session_token = f"analytics_test_session_{timestamp}"
-        
-        # Create MongoDB commands
-        mongo_commands = f"""
-use('test_database');
-var userId = '{self.user_id}';
-var sessionToken = '{self.session_token}';
-var expiresAt = new Date(Date.now() + 7*24*60*60*1000);
-
-// Insert test user
-db.users.insertOne({{
-  user_id: userId,
-  email: 'analytics.test.{timestamp}@example.com',
-  name: 'Analytics Test Teacher',
-  picture: 'https://via.placeholder.com/150',
-  role: 'teacher',
-  batches: [],
-  created_at: new Date().toISOString()
-}});
+    async def warm_up_client(self):
+        """Open the pooled connection (DNS + TLS) early; the response itself is ignored"""
+        try:
+            await self.client.get('/')
+        except httpx.HTTPError:
+            pass
 
-// Insert session
-db.user_sessions.insertOne({{
-  user_id: userId,
-  session_token: sessionToken,
-  expires_at: expiresAt.toISOString(),
-  created_at: new Date().toISOString()
-}});
+    async def wait_for_mongo_setup(self):
+        """Read the shell's output until the setup sentinel; returns (ready, output)"""
+        output = []
+        async for line in self.mongo_shell.stdout:
+            line = line.decode(errors='replace')
+            if MONGO_SETUP_SENTINEL in line:
+                return True, ''.join(output)
+            output.append(line)
+        return False, ''.join(output)
 
-print('Analytics test user and session created successfully');
-"""
+    async def create_test_user_and_session(self):
+        """Create test user and session in MongoDB"""
+        self.log.info("\n🔧 Creating test user and session in MongoDB...")
         
         try:
-            # Write commands to temp file
-            with open('/tmp/mongo_analytics_setup.js', 'w') as f:
-                f.write(mongo_commands)
+            # --shell keeps mongosh running after the setup script so cleanup can reuse it
+            self.mongo_shell = await asyncio.create_subprocess_exec(
+                'mongosh', '--quiet', '--shell', '--eval', self.mongo_setup_script,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+            )
             
-            # Execute MongoDB commands
-            result = subprocess.run([
-                'mongosh', '--quiet', '--file', '/tmp/mongo_analytics_setup.js'
-            ], capture_output=True, text=True, timeout=30)
+            # The HTTPS handshake overlaps with mongosh startup
+            (ready, output), _ = await asyncio.gather(
+                asyncio.wait_for(self.wait_for_mongo_setup(), timeout=30),
+                self.warm_up_client()
+            )
             
-            if result.returncode == 0:
-                print(f"✅ Analytics test user created: {self.user_id}")
-                print(f"✅ Session token: {self.session_token}")
+            if ready:
+                self.client.headers['Authorization'] = f'Bearer {self.session_token}'
+                self.log.info(f"✅ Analytics test user created: {self.user_id}")
+                self.log.info(f"✅ Session token: {self.session_token}")
                 return True
             else:
-                print(f"❌ MongoDB setup failed: {result.stderr}")
+                self.log.info(f"❌ MongoDB setup failed: {output}")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error creating test user: {str(e)}")
+            self.log.info(f"❌ Error creating test user: {str(e)}")
             return False
 
-    def create_test_data(self):
+    async def run_creations(self, *calls):
+        """Run independent create calls concurrently, cancelling the rest on the first failure"""
+        tasks = [asyncio.create_task(call) for call in calls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                if not await next_done:
+                    return None
+            return [task.result() for task in tasks]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def create_test_data(self):
         """Create test data for analytics testing"""
-        print("\n📊 Creating test data for analytics...")
+        self.log.info("\n📊 Creating test data for analytics...")
+        timestamp = datetime.now().strftime('%H%M%S')
         
-        # Create batch
-        batch_data = {"name": f"Analytics Test Batch {datetime.now().strftime('%H%M%S')}"}
-        batch_result = self.run_api_test("Create Test Batch", "POST", "batches", 200, data=batch_data)
-        if not batch_result:
+        # Batch and subject are independent of each other
+        batch_data = {"name": f"Analytics Test Batch {timestamp}"}
+        subject_data = {"name": f"Analytics Test Subject {timestamp}"}
+        results = await self.run_creations(
+            self.run_api_test("Create Test Batch", "POST", "batches", 200, data_bytes=encode_json(batch_data)),
+            self.run_api_test("Create Test Subject", "POST", "subjects", 200, data_bytes=encode_json(subject_data))
+        )
+        if not results:
             return False
+        batch_result, subject_result = results
         self.test_batch_id = batch_result.get('batch_id')
-        
-        # Create subject
-        subject_data = {"name": f"Analytics Test Subject {datetime.now().strftime('%H%M%S')}"}
-        subject_result = self.run_api_test("Create Test Subject", "POST", "subjects", 200, data=subject_data)
-        if not subject_result:
-            return False
         self.test_subject_id = subject_result.get('subject_id')
         
-        # Create student
-        timestamp = datetime.now().strftime('%H%M%S')
+        # Student needs the batch; exam needs batch and subject; neither needs the other
         student_data = {
             "email": f"analytics.student.{timestamp}@school.edu",
             "name": "Analytics Test Student",
@@ -168,10 +252,6 @@ print('Analytics test user and session created successfully');
             "student_id": f"ANALYTICS{timestamp}",
             "batches": [self.test_batch_id]
         }
-        student_result = self.run_api_test("Create Test Student", "POST", "students", 200, data=student_data)
-        if not student_result:
-            return False
-        self.test_student_id = student_result.get('user_id')
         
         # Create exam with detailed questions
         exam_data = {
@@ -197,23 +277,29 @@ print('Analytics test user and session created successfully');
                 }
             ]
         }
-        exam_result = self.run_api_test("Create Test Exam", "POST", "exams", 200, data=exam_data)
-        if not exam_result:
+        results = await self.run_creations(
+            self.run_api_test("Create Test Student", "POST", "students", 200, data_bytes=encode_json(student_data)),
+            self.run_api_test("Create Test Exam", "POST", "exams", 200, data_bytes=encode_json(exam_data))
+        )
+        if not results:
             return False
+        student_result, exam_result = results
+        self.test_student_id = student_result.get('user_id')
         self.test_exam_id = exam_result.get('exam_id')
         
-        print(f"✅ Test data created - Batch: {self.test_batch_id}, Subject: {self.test_subject_id}, Student: {self.test_student_id}, Exam: {self.test_exam_id}")
+        self.log.info(f"✅ Test data created - Batch: {self.test_batch_id}, Subject: {self.test_subject_id}, Student: {self.test_student_id}, Exam: {self.test_exam_id}")
         return True
 
-    def test_analytics_misconceptions(self):
+    async def test_analytics_misconceptions(self):
         """Test GET /api/analytics/misconceptions endpoint"""
-        print("\n📊 Testing Analytics: Misconceptions Analysis...")
+        self.log.info("\n📊 Testing Analytics: Misconceptions Analysis...")
         
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Analytics: Misconceptions Analysis",
             "GET",
             f"analytics/misconceptions?exam_id={self.test_exam_id}",
-            200
+            200,
+            timeout=LLM_ENDPOINT_TIMEOUT
         )
         
         if result:
@@ -228,12 +314,12 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def test_analytics_topic_mastery(self):
+    async def test_analytics_topic_mastery(self):
         """Test GET /api/analytics/topic-mastery endpoint"""
-        print("\n🎯 Testing Analytics: Topic Mastery...")
+        self.log.info("\n🎯 Testing Analytics: Topic Mastery...")
         
         # Test with exam_id filter
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Topic Mastery: With Exam Filter",
             "GET",
             f"analytics/topic-mastery?exam_id={self.test_exam_id}",
@@ -252,15 +338,16 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def test_analytics_student_deep_dive(self):
+    async def test_analytics_student_deep_dive(self):
         """Test GET /api/analytics/student-deep-dive/{student_id} endpoint"""
-        print("\n🔍 Testing Analytics: Student Deep Dive...")
+        self.log.info("\n🔍 Testing Analytics: Student Deep Dive...")
         
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Student Deep Dive: Basic Analysis",
             "GET",
             f"analytics/student-deep-dive/{self.test_student_id}",
-            200
+            200,
+            timeout=LLM_ENDPOINT_TIMEOUT
         )
         
         if result:
@@ -275,15 +362,16 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def test_analytics_generate_review_packet(self):
+    async def test_analytics_generate_review_packet(self):
         """Test POST /api/analytics/generate-review-packet endpoint"""
-        print("\n📝 Testing Analytics: Generate Review Packet...")
+        self.log.info("\n📝 Testing Analytics: Generate Review Packet...")
         
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Generate Review Packet",
             "POST",
             f"analytics/generate-review-packet?exam_id={self.test_exam_id}",
-            200
+            200,
+            timeout=LLM_ENDPOINT_TIMEOUT
         )
         
         if result:
@@ -295,15 +383,16 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def test_exams_infer_topics(self):
+    async def test_exams_infer_topics(self):
         """Test POST /api/exams/{exam_id}/infer-topics endpoint"""
-        print("\n🏷️  Testing Exams: Auto-Infer Topic Tags...")
+        self.log.info("\n🏷️  Testing Exams: Auto-Infer Topic Tags...")
         
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Auto-Infer Topic Tags",
             "POST",
             f"exams/{self.test_exam_id}/infer-topics",
-            200
+            200,
+            timeout=LLM_ENDPOINT_TIMEOUT
         )
         
         if result:
@@ -318,9 +407,9 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def test_exams_update_question_topics(self):
+    async def test_exams_update_question_topics(self):
         """Test PUT /api/exams/{exam_id}/question-topics endpoint"""
-        print("\n✏️  Testing Exams: Update Question Topics...")
+        self.log.info("\n✏️  Testing Exams: Update Question Topics...")
         
         # Test with valid topic updates
         topic_updates = {
@@ -328,7 +417,7 @@ print('Analytics test user and session created successfully');
             "2": ["Algebra", "Quadratic Functions", "Graphing"]
         }
         
-        result = self.run_api_test(
+        result = await self.run_api_test(
             "Update Question Topics",
             "PUT",
             f"exams/{self.test_exam_id}/question-topics",
@@ -346,82 +435,82 @@ print('Analytics test user and session created successfully');
         
         return result
 
-    def cleanup_test_data(self):
+    async def cleanup_test_data(self):
         """Clean up test data from MongoDB"""
-        print("\n🧹 Cleaning up analytics test data...")
+        shell, self.mongo_shell = self.mongo_shell, None
+        if shell is None:
+            return
         
-        cleanup_commands = f"""
-use('test_database');
-// Clean up analytics test data
-db.users.deleteMany({{email: /analytics\\.test\\./}});
-db.user_sessions.deleteMany({{session_token: /analytics_test_session/}});
-db.batches.deleteMany({{name: /Analytics Test Batch/}});
-db.subjects.deleteMany({{name: /Analytics Test Subject/}});
-db.exams.deleteMany({{exam_name: /Analytics Test Exam/}});
-db.submissions.deleteMany({{student_name: /Analytics Test Student/}});
-
-print('Analytics test data cleaned up');
-"""
+        self.log.info("\n🧹 Cleaning up analytics test data...")
         
         try:
-            with open('/tmp/mongo_analytics_cleanup.js', 'w') as f:
-                f.write(cleanup_commands)
-            
-            result = subprocess.run([
-                'mongosh', '--quiet', '--file', '/tmp/mongo_analytics_cleanup.js'
-            ], capture_output=True, text=True, timeout=30)
+            # Closing stdin after the commands lets the shell exit on its own
+            output, _ = await asyncio.wait_for(shell.communicate(MONGO_CLEANUP_COMMANDS.encode()), timeout=30)
             
-            if result.returncode == 0:
-                print("✅ Analytics test data cleaned up")
+            if shell.returncode == 0:
+                self.log.info("✅ Analytics test data cleaned up")
             else:
-                print(f"⚠️  Cleanup warning: {result.stderr}")
+                self.log.info(f"⚠️  Cleanup warning: {output.decode(errors='replace')}")
                 
         except Exception as e:
-            print(f"⚠️  Cleanup error: {str(e)}")
+            if shell.returncode is None:
+                shell.kill()
+            self.log.info(f"⚠️  Cleanup error: {str(e)}")
 
-    def run_analytics_tests(self):
+    async def run_analytics_tests(self):
         """Run all analytics API tests"""
-        print("🚀 Starting Advanced Analytics API Testing")
-        print("=" * 50)
+        self.log.info("🚀 Starting Advanced Analytics API Testing")
+        self.log.info("=" * 50)
         
-        # Create test user and session
-        if not self.create_test_user_and_session():
-            print("❌ Failed to create test user - stopping tests")
-            return False
-        
-        # Create test data
-        if not self.create_test_data():
-            print("❌ Failed to create test data - stopping tests")
-            return False
-        
-        # Test all analytics endpoints
-        print("\n📊 Testing Advanced Analytics Endpoints")
-        print("-" * 50)
-        
-        self.test_analytics_misconceptions()
-        self.test_analytics_topic_mastery()
-        self.test_analytics_student_deep_dive()
-        self.test_analytics_generate_review_packet()
-        self.test_exams_infer_topics()
-        self.test_exams_update_question_topics()
-        
-        # Cleanup
-        self.cleanup_test_data()
+        self.client = self.create_client()
+        try:
+            # Create test user and session
+            if not await self.create_test_user_and_session():
+                self.log.info("❌ Failed to create test user - stopping tests")
+                return False
+            
+            # Create test data
+            if not await self.create_test_data():
+                self.log.info("❌ Failed to create test data - stopping tests")
+                return False
+            
+            # Test all analytics endpoints (independent once the test data exists)
+            self.log.info("\n📊 Testing Advanced Analytics Endpoints")
+            self.log.info("-" * 50)
+            
+            # Gemini-backed endpoints, each with the long read timeout
+            llm_tests = asyncio.gather(
+                self.test_analytics_misconceptions(),
+                self.test_analytics_student_deep_dive(),
+                self.test_analytics_generate_review_packet(),
+                self.test_exams_infer_topics()
+            )
+            # Plain database-backed endpoints
+            crud_tests = asyncio.gather(
+                self.test_analytics_topic_mastery(),
+                self.test_exams_update_question_topics()
+            )
+            await asyncio.gather(llm_tests, crud_tests)
+        finally:
+            # Runs on the early returns too, while the event loop still owns the shell
+            await self.cleanup_test_data()
+            await self.client.aclose()
         
         # Print summary
-        print("\n" + "=" * 50)
-        print(f"📊 Analytics Test Summary: {self.tests_passed}/{self.tests_run} tests passed")
+        self.log.info("\n" + "=" * 50)
+        self.log.info(f"📊 Analytics Test Summary: {self.tests_passed}/{self.tests_run} tests passed")
         
         if self.tests_passed == self.tests_run:
-            print("🎉 All analytics tests passed!")
+            self.log.info("🎉 All analytics tests passed!")
             return True
         else:
-            print(f"⚠️  {self.tests_run - self.tests_passed} analytics tests failed")
+            self.log.info(f"⚠️  {self.tests_run - self.tests_passed} analytics tests failed")
             return False
 
 def main():
     tester = AnalyticsAPITester()
-    success = tester.run_analytics_tests()
+    success = asyncio.run(tester.run_analytics_tests())
+    tester.log_buffer.flush()
     
     # Save detailed results
     results = {
@@ -432,8 +521,12 @@ def main():
         "test_details": tester.test_results
     }
     
-    with open('/app/analytics_test_results.json', 'w') as f:
-        json.dump(results, f, indent=2)
+    if orjson is not None:
+        with open('/app/analytics_test_results.json', 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open('/app/analytics_test_results.json', 'w') as f:
+            json.dump(results, f, indent=2)
     
     return 0 if success else 1
 
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
 import json
 from datetime import datetime, timedelta
@@ -17,6 +19,11 @@ class GradeSenseMultiFormatTester:
         self.tests_passed = 0
         self.test_results = []
         self.test_exam_id = None
+        # One keep-alive session for every request, so each call after the first skips the TLS handshake
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        ))
 
     def log_test(self, name, success, details=""):
         """Log test result"""
@@ -110,13 +117,13 @@ print('Session Token: ' + sessionToken);
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=test_headers, timeout=10)
+                response = self.http.get(url, headers=test_headers, timeout=10)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, timeout=10)
+                response = self.http.post(url, json=data, headers=test_headers, timeout=10)
             elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers, timeout=10)
+                response = self.http.put(url, json=data, headers=test_headers, timeout=10)
             elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers, timeout=10)
+                response = self.http.delete(url, headers=test_headers, timeout=10)
 
             print(f"   Status: {response.status_code}")
             
@@ -163,7 +170,7 @@ print('Session Token: ' + sessionToken);
             if self.session_token:
                 headers['Authorization'] = f'Bearer {self.session_token}'
             
-            response = requests.post(url, files=files, headers=headers, timeout=30)
+            response = self.http.post(url, files=files, headers=headers, timeout=30)
             
             print(f"   Status: {response.status_code}")
             